@@ -1,6 +1,23 @@
-from .technical import TechnicalAnalyzer
-from .fundamental import FundamentalAnalyzer
-from .valuation import ValuationAnalyzer
-from .sentiment import SentimentAnalyzer
-from .risk import RiskAnalyzer
-from .scoring import StockScorer
+"""Analysis engines — resolved lazily so importing one submodule doesn't load them all."""
+
+import importlib
+
+_EXPORTS = {
+    "TechnicalAnalyzer": ".technical",
+    "FundamentalAnalyzer": ".fundamental",
+    "ValuationAnalyzer": ".valuation",
+    "SentimentAnalyzer": ".sentiment",
+    "RiskAnalyzer": ".risk",
+    "StockScorer": ".scoring",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import math
+from statistics import NormalDist
+
 import numpy as np
 import pandas as pd
 import yfinance as yf
@@ -32,7 +35,22 @@ COUNTRY_CURRENCY: dict[str, str] = {
 }
 
 # OTC ADR tickers known to have wide spreads
-OTC_ADR_TICKERS = {"HTHIY", "SHECY", "TOELY", "ATEYY", "HOCPY", "LSRCY", "DSCSY", "FANUY"}
+OTC_ADR_TICKERS = frozenset({"HTHIY", "SHECY", "TOELY", "ATEYY", "HOCPY", "LSRCY", "DSCSY", "FANUY"})
+
+# Corwin-Schultz constants: k = 3 - 2*sqrt(2) ≈ 0.1716, folded so the
+# estimator multiplies instead of dividing.
+#   [sqrt(2*beta) - sqrt(beta)] / k  ==  sqrt(beta) * (sqrt(2) - 1) / k
+#   sqrt(gamma / k)                  ==  sqrt(gamma) / sqrt(k)
+_CS_K = 3.0 - 2.0 * math.sqrt(2.0)
+_CS_BETA_COEF = (math.sqrt(2.0) - 1.0) / _CS_K
+_CS_INV_SQRT_K = 1.0 / math.sqrt(_CS_K)
+
+# Condition number of X'X above which factor_exposure abandons the normal
+# equations for lstsq (squaring X loses about log10(cond) digits).
+_MAX_NORMAL_EQ_COND = 1e10
+
+# Plugin score penalty by circuit-breaker status
+_CB_PENALTY: dict[str, int] = {"RED": 25, "YELLOW": 10}
 
 
 class PortfolioRiskAnalyzer:
@@ -172,7 +190,7 @@ class PortfolioRiskAnalyzer:
             df = self.market.get_price_history(ticker, period="2y")
             if df.empty or len(df) < 60:
                 return {"error": f"Insufficient data for {ticker}"}
-            returns = df["Close"].pct_change().dropna()
+            returns = df["Close"].pct_change().dropna().to_numpy(dtype=float)
             wins = returns[returns > 0]
             losses = returns[returns < 0]
 
@@ -187,7 +205,7 @@ class PortfolioRiskAnalyzer:
                 kelly_pct = max(0.0, (win_rate * wl - (1 - win_rate)) / wl)
             half_kelly = kelly_pct / 2.0
 
-            annual_vol = float(returns.std() * np.sqrt(252))
+            annual_vol = float(returns.std(ddof=1) * np.sqrt(252))
             risk_max = risk_budget / annual_vol if annual_vol > 0 else 0.0
             rec_low = min(half_kelly, risk_max)
             rec_high = min(max(half_kelly, risk_max), 0.25)
@@ -290,17 +308,38 @@ class PortfolioRiskAnalyzer:
         if len(combined) < 30:
             return {"error": "Insufficient overlapping data for factor regression"}
 
-        y = combined["portfolio"].values
-        X = np.column_stack([np.ones(len(y)), combined[factor_names].values])
-
-        try:
-            coeffs, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
-        except np.linalg.LinAlgError as exc:
-            return {"error": f"Regression failed: {exc}"}
-
-        y_pred = X @ coeffs
-        ss_res = float(np.sum((y - y_pred) ** 2))
-        ss_tot = float(np.sum((y - y.mean()) ** 2))
+        y = combined["portfolio"].to_numpy(dtype=float)
+        # Design matrix filled in place: one C-contiguous allocation, laid
+        # out row-major for the X.T @ X product below.
+        X = np.empty((len(y), len(factor_names) + 1))
+        X[:, 0] = 1.0
+        X[:, 1:] = combined[factor_names].to_numpy(dtype=float)
+
+        # At most six regressors: solving the small normal equations is far
+        # cheaper than the SVD behind lstsq. Collinear or near-collinear
+        # factors make X'X singular or ill-conditioned, so fall back to
+        # lstsq, which handles rank deficiency stably.
+        xtx = X.T @ X
+        xty = X.T @ y
+        coeffs = None
+        if np.linalg.cond(xtx) < _MAX_NORMAL_EQ_COND:
+            try:
+                coeffs = np.linalg.solve(xtx, xty)
+            except np.linalg.LinAlgError:
+                coeffs = None
+        if coeffs is not None:
+            # Residual sum of squares from the normal equations (y'y - b'X'y),
+            # valid only for their exact solution.
+            ss_res = max(float(y @ y - coeffs @ xty), 0.0)
+        else:
+            try:
+                coeffs = np.linalg.lstsq(X, y, rcond=None)[0]
+            except np.linalg.LinAlgError as exc:
+                return {"error": f"Regression failed: {exc}"}
+            resid = y - X @ coeffs
+            ss_res = float(resid @ resid)
+        dev = y - y.mean()
+        ss_tot = float(dev @ dev)
         r_sq = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
 
         result = {n: round(float(b), 4) for n, b in zip(factor_names, coeffs[1:])}
@@ -330,16 +369,26 @@ class PortfolioRiskAnalyzer:
         return valid, vw
 
     def _fetch_all_prices(self, tickers: list[str], period: str = "2y") -> dict[str, pd.DataFrame]:
+        # The batch isolates per-ticker failures itself; if the call as a
+        # whole still fails, fetch one ticker at a time.
+        try:
+            fetched = self.market.get_price_history_batch(tickers, period=period)
+        except Exception as exc:
+            logger.warning("Batch fetch failed for %s: %s", ", ".join(tickers), exc)
+            fetched = {}
+            for ticker in tickers:
+                try:
+                    fetched[ticker] = self.market.get_price_history(ticker, period=period)
+                except Exception as e:
+                    logger.warning("Failed to fetch %s: %s", ticker, e)
+
         data: dict[str, pd.DataFrame] = {}
         for ticker in tickers:
-            try:
-                df = self.market.get_price_history(ticker, period=period)
-                if df is not None and not df.empty:
-                    data[ticker] = df
-                else:
-                    logger.warning("Empty price data for %s", ticker)
-            except Exception as exc:
-                logger.warning("Failed to fetch %s: %s", ticker, exc)
+            df = fetched.get(ticker)
+            if df is not None and not df.empty:
+                data[ticker] = df
+            else:
+                logger.warning("Empty price data for %s", ticker)
         return data
 
     @staticmethod
@@ -355,11 +404,13 @@ class PortfolioRiskAnalyzer:
         return df
 
     def _portfolio_metrics(self, port_returns, returns_df, valid_tickers, valid_weights, rf):
-        port_vol = float(port_returns.std() * np.sqrt(252))
+        port_r = port_returns.to_numpy(dtype=float)
+        port_vol = float(port_r.std(ddof=1) * np.sqrt(252))
 
         rf_daily = rf / 252
-        excess = port_returns - rf_daily
-        port_sharpe = float(excess.mean() / excess.std() * np.sqrt(252)) if excess.std() > 0 else 0.0
+        excess = port_r - rf_daily
+        excess_std = excess.std(ddof=1)
+        port_sharpe = float(excess.mean() / excess_std * np.sqrt(252)) if excess_std > 0 else 0.0
 
         try:
             spy_df = self.market.get_price_history("SPY", period="2y")
@@ -386,15 +437,14 @@ class PortfolioRiskAnalyzer:
     @staticmethod
     def _compute_var(port_returns: pd.Series, confidence: float = 0.95) -> dict:
         alpha = 1 - confidence
-        clean = port_returns.dropna()
+        clean = port_returns.dropna().to_numpy(dtype=float)
         daily_var = float(np.percentile(clean, alpha * 100))
         annual_var = daily_var * np.sqrt(252)
         tail = clean[clean <= daily_var]
         daily_cvar = float(tail.mean()) if len(tail) > 0 else daily_var
 
-        from scipy.stats import norm
-        z = norm.ppf(alpha)
-        mu, sigma = float(clean.mean()), float(clean.std())
+        z = NormalDist().inv_cdf(alpha)
+        mu, sigma = float(clean.mean()), float(clean.std(ddof=1))
         p_daily = mu + z * sigma
         p_annual = p_daily * np.sqrt(252)
 
@@ -645,8 +695,21 @@ class PortfolioRiskAnalyzer:
     # Transaction cost model (P7)
     # ------------------------------------------------------------------
 
+    # Display precision applied to transaction_cost_model output
+    COST_OUTPUT_DECIMALS = {
+        "estimated_spread_pct": 3,
+        "spread_cost_usd": 2,
+        "market_impact_pct": 3,
+        "market_impact_usd": 2,
+        "total_cost_pct": 3,
+        "total_cost_usd": 2,
+        "avg_daily_dollar_volume": 0,
+        "participation_rate": 4,
+        "max_recommended_trade_usd": 0,
+    }
+
     @staticmethod
-    def _corwin_schultz_spread(df: pd.DataFrame, window: int = 20) -> float:
+    def _corwin_schultz_spread(high: np.ndarray, low: np.ndarray, window: int = 20) -> float:
         """Corwin-Schultz (2012) high-low spread estimator.
 
         Uses the 2-period range decomposition to separate spread from volatility:
@@ -658,98 +721,123 @@ class PortfolioRiskAnalyzer:
 
         Returns estimated percentage spread (e.g. 0.35 means 0.35%).
         """
-        h = df["High"].values.astype(float)
-        l = df["Low"].values.astype(float)
+        h = np.asarray(high, dtype=float)
+        l = np.array(low, dtype=float)  # copied: clamped in place below
 
         # Guard against bad data
         valid = (h > 0) & (l > 0) & (h >= l)
         if valid.sum() < 5:
             return 0.0
 
-        hl_log_sq = np.log(h / np.maximum(l, 1e-10)) ** 2
+        # Only the trailing `window` spreads are averaged and each needs two
+        # consecutive bars, so the last window + 1 bars are all that is used.
+        if window > 0:
+            h, l = h[-(window + 1):], l[-(window + 1):]
+
+        # Take logs once; ln(H/L) terms become differences, and since log is
+        # monotonic the 2-day max/min can be taken on the logs directly.
+        log_h = np.log(h)
+        log_l = np.log(np.maximum(l, 1e-10, out=l))
+
+        hl_log_sq = (log_h - log_l) ** 2
 
         # beta: sum of consecutive single-day range-squared
         beta = hl_log_sq[1:] + hl_log_sq[:-1]
 
         # gamma: 2-day high-low range squared
-        h2 = np.maximum(h[1:], h[:-1])
-        l2 = np.minimum(l[1:], l[:-1])
-        gamma = np.log(h2 / np.maximum(l2, 1e-10)) ** 2
+        log_h2 = np.maximum(log_h[1:], log_h[:-1])
+        log_l2 = np.minimum(log_l[1:], log_l[:-1])
+        gamma = (log_h2 - log_l2) ** 2
 
-        k = 3.0 - 2.0 * np.sqrt(2.0)  # ≈ 0.1716
+        alpha = np.sqrt(beta) * _CS_BETA_COEF - np.sqrt(gamma) * _CS_INV_SQRT_K
+        np.maximum(alpha, 0.0, out=alpha)  # Negative alpha → zero spread
 
-        alpha = (np.sqrt(2.0 * beta) - np.sqrt(beta)) / k - np.sqrt(gamma / k)
-        alpha = np.maximum(alpha, 0.0)  # Negative alpha → zero spread
+        # S = 2*(e^alpha - 1) / (1 + e^alpha), evaluated with in-place ufuncs
+        exp_alpha = np.exp(alpha, out=alpha)
+        spread = exp_alpha - 1.0
+        spread *= 2.0
+        spread /= exp_alpha + 1.0
 
-        spread = 2.0 * (np.exp(alpha) - 1.0) / (1.0 + np.exp(alpha))
-
-        # Average over trailing window
-        tail = spread[-window:] if len(spread) >= window else spread
-        avg_spread = float(np.mean(tail)) if len(tail) > 0 else 0.0
+        avg_spread = float(spread.mean()) if len(spread) > 0 else 0.0
 
         return avg_spread * 100  # Convert to percentage
 
-    def transaction_cost_model(self, ticker: str, trade_value_usd: float = 100_000) -> dict:
+    def transaction_cost_model(self, ticker: str, trade_value_usd: float = 100_000,
+                               round_output: bool = True) -> dict:
         """Estimate transaction costs, especially for OTC ADRs.
 
         Uses the Corwin-Schultz (2012) 2-period spread estimator for spread,
         and Kyle's lambda sqrt model for market impact.
+
+        Pass round_output=False to get unrounded floats when the result feeds
+        further calculations rather than display.
         """
         try:
             df = self.market.get_price_history(ticker, period="3mo")
             if df.empty:
                 return {"error": f"No price data for {ticker}"}
 
-            price = float(df["Close"].iloc[-1])
+            # Pull columns to NumPy once; everything below works on raw arrays
+            close = df["Close"].to_numpy(dtype=float)
+            price = float(close[-1])
+            is_otc = ticker in OTC_ADR_TICKERS
 
             # 1. Spread estimation — Corwin-Schultz (2012) 2-period formula
             if "High" in df.columns and "Low" in df.columns and len(df) >= 5:
-                avg_spread_pct = self._corwin_schultz_spread(df)
+                avg_spread_pct = self._corwin_schultz_spread(
+                    df["High"].to_numpy(dtype=float), df["Low"].to_numpy(dtype=float))
             else:
-                avg_spread_pct = 0.5 if ticker in OTC_ADR_TICKERS else 0.1
+                avg_spread_pct = 0.5 if is_otc else 0.1
 
             # OTC floor: OTC ADRs have at least 0.30% effective spread
-            if ticker in OTC_ADR_TICKERS:
+            if is_otc:
                 avg_spread_pct = max(avg_spread_pct, 0.30)
 
             spread_cost_usd = trade_value_usd * avg_spread_pct / 100 / 2  # half-spread
 
             # 2. Market impact (Kyle's lambda sqrt model)
-            vol_20d = float(df["Volume"].tail(20).mean()) if "Volume" in df.columns else 0
+            if "Volume" in df.columns:
+                vol_20d = float(np.nanmean(df["Volume"].to_numpy(dtype=float)[-20:]))
+            else:
+                vol_20d = 0
             dollar_vol_20d = vol_20d * price
 
-            returns = df["Close"].pct_change().dropna()
-            daily_vol = float(returns.std()) if len(returns) > 10 else 0.02
+            returns = close[1:] / close[:-1] - 1.0
+            returns = returns[~np.isnan(returns)]
+            daily_vol = float(returns.std(ddof=1)) if len(returns) > 10 else 0.02
 
             shares_to_trade = trade_value_usd / price if price > 0 else 0
             participation = shares_to_trade / vol_20d if vol_20d > 0 else 1.0
 
-            import math
             market_impact_pct = daily_vol * math.sqrt(min(participation, 1.0)) * 100
             market_impact_usd = trade_value_usd * market_impact_pct / 100
 
             # 3. Participation rate limits
-            max_participation = 0.10 if ticker in OTC_ADR_TICKERS else 0.25
+            max_participation = 0.10 if is_otc else 0.25
             max_trade_value = dollar_vol_20d * max_participation
 
             total_cost_pct = avg_spread_pct / 2 + market_impact_pct
 
-            return {
+            result = {
                 "ticker": ticker,
-                "is_otc_adr": ticker in OTC_ADR_TICKERS,
+                "is_otc_adr": is_otc,
                 "spread_estimator": "Corwin-Schultz (2012)",
-                "estimated_spread_pct": round(avg_spread_pct, 3),
-                "spread_cost_usd": round(spread_cost_usd, 2),
-                "market_impact_pct": round(market_impact_pct, 3),
-                "market_impact_usd": round(market_impact_usd, 2),
-                "total_cost_pct": round(total_cost_pct, 3),
-                "total_cost_usd": round(spread_cost_usd + market_impact_usd, 2),
-                "avg_daily_dollar_volume": round(dollar_vol_20d, 0),
-                "participation_rate": round(participation, 4),
-                "max_recommended_trade_usd": round(max_trade_value, 0),
+                "estimated_spread_pct": avg_spread_pct,
+                "spread_cost_usd": spread_cost_usd,
+                "market_impact_pct": market_impact_pct,
+                "market_impact_usd": market_impact_usd,
+                "total_cost_pct": total_cost_pct,
+                "total_cost_usd": spread_cost_usd + market_impact_usd,
+                "avg_daily_dollar_volume": dollar_vol_20d,
+                "participation_rate": participation,
+                "max_recommended_trade_usd": max_trade_value,
                 "max_participation_pct": max_participation * 100,
                 "warning": "EXCEEDS MAX PARTICIPATION" if trade_value_usd > max_trade_value else None,
             }
+            if round_output:
+                for key, ndigits in self.COST_OUTPUT_DECIMALS.items():
+                    result[key] = round(result[key], ndigits)
+            return result
         except Exception as e:
             return {"error": str(e)}
 
@@ -774,55 +862,43 @@ class PortfolioRiskAnalyzerPlugin(_BaseAnalyzer):
 
     def analyze(self, ticker, ctx):
         tickers = ctx.tickers if ctx.tickers else [ticker]
-        tickers_key = tuple(sorted(tickers))
+        tickers_key = frozenset(tickers)
 
         # Compute once, cache for the rest of the pipeline run
         if self._cached_key != tickers_key:
             n = len(tickers)
             holdings = [{"ticker": t, "weight": 1.0 / n} for t in tickers]
             try:
-                self._cached_result = self._analyzer.analyze(holdings)
+                result = self._analyzer.analyze(holdings)
             except Exception as e:
                 logger.warning("Portfolio risk analysis failed: %s", e)
-                self._cached_result = {"error": str(e)}
+                result = {"error": str(e)}
+            # The score only depends on the shared portfolio result,
+            # so the cached entry is stored already scored
+            result["score"] = self._score(result)
+            self._cached_result = result
             self._cached_key = tickers_key
 
-        result = dict(self._cached_result)  # shallow copy
+        return self._cached_result.copy()  # shallow copy
 
-        # Compute score from portfolio metrics
+    @staticmethod
+    def _score(result: dict) -> float | None:
+        """Score (0-100) from portfolio metrics; None if the analysis failed."""
         if "error" in result:
-            result["score"] = None
-            return result
-
-        score = 70.0
+            return None
 
-        metrics = result.get("portfolio_metrics", {})
+        metrics = result.get("portfolio_metrics") or {}
+        conc = result.get("concentration") or {}
+        cb = result.get("circuit_breaker") or {}
         port_vol = metrics.get("portfolio_volatility", 0.2)
-        if port_vol > 0.3:
-            score -= 20
-        elif port_vol > 0.2:
-            score -= 10
-
         div_ratio = metrics.get("diversification_ratio", 1.0)
-        if div_ratio > 1.3:
-            score += 10
-        elif div_ratio < 1.1:
-            score -= 10
-
-        conc = result.get("concentration", {})
         hhi = conc.get("hhi", 0)
-        if hhi > 0.2:
-            score -= 15
-        elif hhi > 0.1:
-            score -= 5
-
-        # Circuit breaker penalty
-        cb = result.get("circuit_breaker", {})
         cb_status = cb.get("status", "OK")
-        if cb_status == "RED":
-            score -= 25
-        elif cb_status == "YELLOW":
-            score -= 10
 
-        result["score"] = round(max(0, min(100, score)), 1)
-        return result
+        score = 70.0
+        score -= 20 if port_vol > 0.3 else 10 if port_vol > 0.2 else 0
+        score += 10 if div_ratio > 1.3 else -10 if div_ratio < 1.1 else 0
+        score -= 15 if hhi > 0.2 else 5 if hhi > 0.1 else 0
+        score -= _CB_PENALTY.get(cb_status, 0)  # Circuit breaker penalty
+
+        return round(max(0, min(100, score)), 1)
@@ -4,14 +4,43 @@ Enhanced with dynamic benchmark selection (SPY vs Nikkei vs sector ETF),
 tail risk metrics (skewness, kurtosis), and liquidity risk assessment.
 """
 
+import math
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
 import numpy as np
 import pandas as pd
+import yfinance as yf
 
 from src.data_sources.market_data import MarketDataClient
+from src.utils.cache import DataCache
 from src.utils.logger import setup_logger
 
 logger = setup_logger("risk")
 
+_STD_NORMAL = NormalDist()
+_SQRT_252 = math.sqrt(252)  # daily -> annual scaling for volatility-based ratios
+
+# Tier tables: a value below breaks[i] falls in tier i, anything at or
+# above the last break in the final tier.
+_VOL_BREAKS = (0.15, 0.30, 0.50)
+_VOL_LEVELS = ("LOW", "MODERATE", "HIGH", "VERY HIGH")
+
+_LIQUIDITY_BREAKS = (500_000, 5_000_000, 50_000_000)
+_LIQUIDITY_TIERS = (
+    ("ILLIQUID", "Very low dollar volume — significant execution risk"),
+    ("LOW LIQUIDITY", "Low dollar volume — may face slippage"),
+    ("ADEQUATE", "Adequate liquidity for moderate positions"),
+    ("HIGHLY LIQUID", "High liquidity — minimal execution risk"),
+)
+
+# Metrics rounded to 4dp once the result dict is assembled in analyze()
+_ROUNDED_METRICS = ("volatility", "sharpe_ratio", "sortino_ratio", "max_drawdown", "beta",
+                    "var_95", "cvar_95", "var_95_gaussian", "cvar_95_gaussian",
+                    "skewness", "kurtosis")
+
 
 # ------------------------------------------------------------------
 # Risk-free rate with live refresh
@@ -20,6 +49,10 @@ _RF_RATE: float = 0.04          # annual, decimal
 _RF_RATE_UPDATED: str = "2026-02-01"
 _RF_RATE_SOURCE: str = "static"
 
+# On-disk copy of the last ^IRX fetch so new processes skip the download
+_rf_cache = DataCache("macro_data")
+_RF_CACHE_KEY = "risk_free_rate_irx"
+
 
 def _refresh_risk_free_rate() -> None:
     """Attempt to fetch the 13-week T-bill yield (^IRX) from yfinance."""
@@ -28,8 +61,15 @@ def _refresh_risk_free_rate() -> None:
     last = datetime.strptime(_RF_RATE_UPDATED, "%Y-%m-%d")
     if (datetime.now() - last).days < 7:
         return  # Refreshed recently
+    # A rate fetched by another process within the cache TTL is good enough
+    try:
+        cached = _rf_cache.get(_RF_CACHE_KEY)
+        if cached is not None:
+            _RF_RATE, _RF_RATE_UPDATED, _RF_RATE_SOURCE = cached["rate"], cached["date"], cached["source"]
+            return
+    except Exception:
+        pass  # Unreadable cache file; fall through to a live fetch
     try:
-        import yfinance as yf
         tk = yf.Ticker("^IRX")
         hist = tk.history(period="5d")
         if not hist.empty:
@@ -39,6 +79,8 @@ def _refresh_risk_free_rate() -> None:
                 _RF_RATE_UPDATED = datetime.now().strftime("%Y-%m-%d")
                 _RF_RATE_SOURCE = "^IRX (13-week T-bill)"
                 logger.info("Risk-free rate refreshed: %.4f from ^IRX", _RF_RATE)
+                _rf_cache.set(_RF_CACHE_KEY, {"rate": _RF_RATE, "date": _RF_RATE_UPDATED,
+                                              "source": _RF_RATE_SOURCE})
     except Exception:
         pass  # Keep static fallback
 
@@ -78,59 +120,126 @@ SECTOR_BENCHMARKS = {
 }
 
 
+# In-process cache of benchmark price history:
+# (ticker, period) -> (monotonic fetch time, DataFrame).
+# Every stock in a batch run shares a handful of benchmarks, so each one is
+# loaded once per TTL instead of once per analyzed ticker; the TTL keeps
+# long-lived processes (the dashboard server) from serving stale prices.
+_BENCHMARK_HISTORY: dict[tuple[str, str], tuple[float, pd.DataFrame]] = {}
+_BENCHMARK_TTL_SEC = 3600
+
+# In-process cache of the profile fields benchmark selection needs:
+# ticker -> (country, sector, industry).
+_TICKER_PROFILE: dict[str, tuple[str, str, str]] = {}
+
+
+def _ticker_profile(ticker: str) -> tuple[str, str, str]:
+    """(country, sector, industry) from yfinance ``.info``, fetched once per ticker."""
+    profile = _TICKER_PROFILE.get(ticker)
+    if profile is None:
+        info = yf.Ticker(ticker).info
+        profile = (info.get("country", "United States") or "United States",
+                   info.get("sector", ""),
+                   info.get("industry", ""))
+        if info:  # an empty payload is usually a throttled request; retry later
+            _TICKER_PROFILE[ticker] = profile
+    return profile
+
+
+# Memoized _select_benchmark results: ticker -> (benchmark, reason).
+_BENCHMARK_CHOICE: dict[str, tuple[str, str]] = {}
+
+# Shared by every analyze() call for the benchmark lookup, so concurrent
+# callers (e.g. StockScorer.score_many) don't each start and stop a pool.
+# Its tasks never wait on the pool themselves, so a small bound can't deadlock.
+_BENCHMARK_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="risk-benchmark")
+
+
 class RiskAnalyzer:
     """Assess investment risk for a stock."""
 
     def __init__(self):
         self.market = MarketDataClient()
 
+    def _benchmark_history(self, benchmark: str, period: str) -> pd.DataFrame:
+        """Price history for a benchmark, memoized in-process for an hour."""
+        key = (benchmark, period)
+        now = time.monotonic()
+        entry = _BENCHMARK_HISTORY.get(key)
+        if entry is not None and now - entry[0] < _BENCHMARK_TTL_SEC:
+            return entry[1]
+        df = self.market.get_price_history(benchmark, period=period)
+        if not df.empty:  # don't pin failures; let the next call retry
+            _BENCHMARK_HISTORY[key] = (now, df)
+        return df
+
     def _select_benchmark(self, ticker: str) -> tuple[str, str]:
         """Dynamically select the most appropriate benchmark for a stock.
 
         Returns (benchmark_ticker, reason) based on the stock's country
         and sector, falling back to SPY for US stocks.
         """
+        choice = _BENCHMARK_CHOICE.get(ticker)
+        if choice is not None:
+            return choice
+
         try:
-            import yfinance as yf
-            info = yf.Ticker(ticker).info
-            country = info.get("country", "United States") or "United States"
-            sector = info.get("sector", "")
-            industry = info.get("industry", "")
+            country, sector, industry = _ticker_profile(ticker)
+        except Exception as e:
+            logger.debug("Benchmark selection failed for %s: %s — defaulting to SPY", ticker, e)
+            return "SPY", "S&P 500 (default)"
 
-            # Non-US stocks: use country ETF
-            if country != "United States" and country in COUNTRY_BENCHMARKS:
-                return COUNTRY_BENCHMARKS[country], f"Country benchmark ({country})"
+        # Non-US stocks: use country ETF
+        if country != "United States" and country in COUNTRY_BENCHMARKS:
+            choice = COUNTRY_BENCHMARKS[country], f"Country benchmark ({country})"
 
-            # Semiconductor stocks get SOXX
-            if "semiconductor" in (industry or "").lower() or "Semiconductors" in (sector or ""):
-                return "SOXX", f"Sector benchmark (Semiconductors)"
+        # Semiconductor stocks get SOXX
+        elif "semiconductor" in (industry or "").lower() or "Semiconductors" in (sector or ""):
+            choice = "SOXX", f"Sector benchmark (Semiconductors)"
 
-            # Other US stocks: use sector ETF if available
-            if sector in SECTOR_BENCHMARKS:
-                return SECTOR_BENCHMARKS[sector], f"Sector benchmark ({sector})"
+        # Other US stocks: use sector ETF if available
+        elif sector in SECTOR_BENCHMARKS:
+            choice = SECTOR_BENCHMARKS[sector], f"Sector benchmark ({sector})"
 
-        except Exception as e:
-            logger.debug("Benchmark selection failed for %s: %s — defaulting to SPY", ticker, e)
+        else:
+            choice = "SPY", "S&P 500 (default)"
 
-        return "SPY", "S&P 500 (default)"
+        # Only pin the choice once the underlying profile is cached too
+        if ticker in _TICKER_PROFILE:
+            _BENCHMARK_CHOICE[ticker] = choice
+        return choice
 
-    def analyze(self, ticker: str, benchmark: str | None = None, period: str = "2y") -> dict:
-        """Full risk analysis for a ticker with dynamic benchmark."""
+    def _resolve_benchmark(self, ticker: str, benchmark: str | None,
+                           period: str) -> tuple[str, str, pd.DataFrame]:
+        """Pick the benchmark (unless given) and load its history.
+
+        Returns (benchmark_ticker, reason, history), falling back to SPY
+        when the chosen benchmark has no data.
+        """
         # Dynamic benchmark selection
         if benchmark is None:
             benchmark, bench_reason = self._select_benchmark(ticker)
         else:
             bench_reason = "User-specified"
 
-        df = self.market.get_price_history(ticker, period=period)
-        bench_df = self.market.get_price_history(benchmark, period=period)
+        bench_df = self._benchmark_history(benchmark, period)
 
         # Fallback to SPY if country ETF fails
         if bench_df.empty and benchmark != "SPY":
             logger.warning("Benchmark %s returned no data, falling back to SPY", benchmark)
             benchmark = "SPY"
             bench_reason = "S&P 500 (fallback)"
-            bench_df = self.market.get_price_history(benchmark, period=period)
+            bench_df = self._benchmark_history(benchmark, period)
+        return benchmark, bench_reason, bench_df
+
+    def analyze(self, ticker: str, benchmark: str | None = None, period: str = "2y") -> dict:
+        """Full risk analysis for a ticker with dynamic benchmark."""
+        # Benchmark selection (an info lookup) and its history load run on the
+        # shared background pool while the stock's own history, which
+        # doesn't depend on them, is fetched on this thread.
+        bench_future = _BENCHMARK_POOL.submit(self._resolve_benchmark, ticker, benchmark, period)
+        df = self.market.get_price_history(ticker, period=period)
+        benchmark, bench_reason, bench_df = bench_future.result()
 
         if df.empty:
             return {"error": "No price data"}
@@ -138,11 +247,21 @@ class RiskAnalyzer:
         returns = df["Close"].pct_change().dropna()
         bench_returns = bench_df["Close"].pct_change().dropna()
 
-        # Align dates
-        aligned = pd.concat([returns, bench_returns], axis=1, join="inner")
-        aligned.columns = ["stock", "benchmark"]
+        # Metric helpers work on plain arrays. Dates are aligned by
+        # intersecting the two indexes' datetime64 values (UTC instants for
+        # tz-aware indexes) and slicing positionally, without building a
+        # joined DataFrame.
+        r = returns.to_numpy(dtype=float)
+        _, i_stock, i_bench = np.intersect1d(returns.index.values, bench_returns.index.values,
+                                             return_indices=True)
+        stock_r = r[i_stock]
+        bench_r = bench_returns.to_numpy(dtype=float)[i_bench]
+        # Sample co-moments of the aligned pair, shared by beta and correlation
+        comoments = self._comoments(stock_r, bench_r)
 
         rf_rate, rf_date, rf_source = get_risk_free_rate()
+        sharpe, sortino = self._sharpe_sortino(r, rf_rate)
+        std, skew, kurt = self._moments(r)
 
         result = {
             "ticker": ticker,
@@ -152,18 +271,23 @@ class RiskAnalyzer:
             "risk_free_rate": rf_rate,
             "risk_free_rate_as_of": rf_date,
             "risk_free_rate_source": rf_source,
-            "volatility": self._annualized_volatility(returns),
-            "sharpe_ratio": self._sharpe_ratio(returns, rf_rate),
-            "sortino_ratio": self._sortino_ratio(returns, rf_rate),
+            "volatility": std * _SQRT_252,
+            "sharpe_ratio": sharpe,
+            "sortino_ratio": sortino,
             "max_drawdown": self._max_drawdown(df["Close"]),
-            "beta": self._beta(aligned["stock"], aligned["benchmark"]),
-            "var_95": self._value_at_risk(returns, confidence=0.95),
-            "cvar_95": self._conditional_var(returns, confidence=0.95),
+            "beta": self._beta(comoments),
         }
+        result["var_95"], result["cvar_95"] = self._var_cvar(r, confidence=0.95)
+        result["var_95_gaussian"], result["cvar_95_gaussian"] = self._gaussian_var_cvar(r, confidence=0.95)
 
         # --- NEW: Tail risk metrics ---
-        result["skewness"] = round(float(returns.skew()), 4) if len(returns) > 10 else None
-        result["kurtosis"] = round(float(returns.kurtosis()), 4) if len(returns) > 10 else None
+        result["skewness"] = skew
+        result["kurtosis"] = kurt
+
+        # Helpers return raw floats; round the reported metrics in one place
+        for key in _ROUNDED_METRICS:
+            if result[key] is not None:
+                result[key] = round(float(result[key]), 4)
 
         # Negative skew + high kurtosis = fat left tails (crash risk)
         if result["skewness"] is not None and result["kurtosis"] is not None:
@@ -178,19 +302,11 @@ class RiskAnalyzer:
         result["liquidity"] = self._liquidity_assessment(df)
 
         # --- NEW: Correlation with benchmark ---
-        if len(aligned) > 20:
-            result["correlation"] = round(float(aligned["stock"].corr(aligned["benchmark"])), 4)
+        if len(stock_r) > 20:
+            result["correlation"] = round(self._correlation(comoments), 4)
 
         # Risk rating
-        vol = result["volatility"]
-        if vol < 0.15:
-            result["risk_level"] = "LOW"
-        elif vol < 0.30:
-            result["risk_level"] = "MODERATE"
-        elif vol < 0.50:
-            result["risk_level"] = "HIGH"
-        else:
-            result["risk_level"] = "VERY HIGH"
+        result["risk_level"] = _VOL_LEVELS[bisect_right(_VOL_BREAKS, result["volatility"])]
 
         return result
 
@@ -201,9 +317,9 @@ class RiskAnalyzer:
             if "Volume" not in df.columns:
                 return {"signal": "NO DATA"}
 
-            vol = df["Volume"].tail(20)
-            avg_vol = float(vol.mean())
-            min_vol = float(vol.min())
+            vol = df["Volume"].to_numpy(dtype=float)[-20:]
+            avg_vol = float(np.nanmean(vol))
+            min_vol = float(np.nanmin(vol))
 
             result = {
                 "avg_daily_volume_20d": int(avg_vol),
@@ -211,74 +327,129 @@ class RiskAnalyzer:
             }
 
             # Dollar volume estimate
-            latest_price = float(df["Close"].iloc[-1])
+            latest_price = float(df["Close"].to_numpy()[-1])
             dollar_vol = avg_vol * latest_price
             result["avg_dollar_volume_20d"] = round(dollar_vol, 0)
 
-            if dollar_vol < 500_000:
-                result["signal"] = "ILLIQUID"
-                result["detail"] = "Very low dollar volume — significant execution risk"
-            elif dollar_vol < 5_000_000:
-                result["signal"] = "LOW LIQUIDITY"
-                result["detail"] = "Low dollar volume — may face slippage"
-            elif dollar_vol < 50_000_000:
-                result["signal"] = "ADEQUATE"
-                result["detail"] = "Adequate liquidity for moderate positions"
-            else:
-                result["signal"] = "HIGHLY LIQUID"
-                result["detail"] = "High liquidity — minimal execution risk"
+            result["signal"], result["detail"] = _LIQUIDITY_TIERS[bisect_right(_LIQUIDITY_BREAKS, dollar_vol)]
 
             return result
         except Exception:
             return {"signal": "NO DATA"}
 
     @staticmethod
-    def _annualized_volatility(returns: pd.Series) -> float:
-        return round(float(returns.std() * np.sqrt(252)), 4)
-
-    @staticmethod
-    def _sharpe_ratio(returns: pd.Series, risk_free_annual: float | None = None) -> float:
+    def _sharpe_sortino(returns: np.ndarray, risk_free_annual: float | None = None) -> tuple[float, float]:
+        """Sharpe and Sortino ratios from one excess-return array and mean."""
         if risk_free_annual is None:
             risk_free_annual = get_risk_free_rate()[0]
         rf_daily = risk_free_annual / 252
         excess = returns - rf_daily
-        if excess.std() == 0:
-            return 0.0
-        return round(float(excess.mean() / excess.std() * np.sqrt(252)), 4)
+        mean = excess.mean()
+        std = excess.std(ddof=1)
+        downside_std = excess[excess < 0].std(ddof=1)
+        sharpe = 0.0 if std == 0 else float(mean / std * _SQRT_252)
+        sortino = 0.0 if downside_std == 0 else float(mean / downside_std * _SQRT_252)
+        return sharpe, sortino
 
     @staticmethod
-    def _sortino_ratio(returns: pd.Series, risk_free_annual: float | None = None) -> float:
-        if risk_free_annual is None:
-            risk_free_annual = get_risk_free_rate()[0]
-        rf_daily = risk_free_annual / 252
-        excess = returns - rf_daily
-        downside = excess[excess < 0]
-        if downside.std() == 0:
-            return 0.0
-        return round(float(excess.mean() / downside.std() * np.sqrt(252)), 4)
+    def _max_drawdown(prices: pd.Series) -> float:
+        p = prices.to_numpy(dtype=float)
+        # fmax skips NaN gaps the same way pandas' cummax does
+        cummax = np.fmax.accumulate(p)
+        # Divide in place: the drawdown costs one temporary instead of two
+        drawdown = np.subtract(p, cummax)
+        drawdown /= cummax
+        return float(np.nanmin(drawdown))
 
     @staticmethod
-    def _max_drawdown(prices: pd.Series) -> float:
-        cummax = prices.cummax()
-        drawdown = (prices - cummax) / cummax
-        return round(float(drawdown.min()), 4)
+    def _comoments(stock_returns: np.ndarray, bench_returns: np.ndarray) -> np.ndarray:
+        """2x2 sample covariance of [stock, benchmark] from demeaned dot products."""
+        n = stock_returns.size
+        if n < 2:
+            return np.full((2, 2), np.nan)
+        sd = stock_returns - stock_returns.mean()
+        bd = bench_returns - bench_returns.mean()
+        cov = sd @ bd
+        return np.array([[sd @ sd, cov], [cov, bd @ bd]]) / (n - 1)
 
     @staticmethod
-    def _beta(stock_returns: pd.Series, bench_returns: pd.Series) -> float:
-        cov = stock_returns.cov(bench_returns)
-        var = bench_returns.var()
+    def _beta(comoments: np.ndarray) -> float:
+        """Beta from the 2x2 [stock, benchmark] covariance matrix."""
+        var = comoments[1, 1]
         if var == 0:
             return 0.0
-        return round(float(cov / var), 4)
+        return float(comoments[0, 1] / var)
+
+    @staticmethod
+    def _correlation(comoments: np.ndarray) -> float:
+        """Pearson correlation from the 2x2 [stock, benchmark] covariance matrix."""
+        sd = np.sqrt(np.diag(comoments))
+        return float(np.clip(comoments[0, 1] / sd[0] / sd[1], -1.0, 1.0))
+
+    @staticmethod
+    def _var_cvar(returns: np.ndarray, confidence: float = 0.95) -> tuple[float, float]:
+        """Historical VaR and CVaR from one partial sort.
+
+        VaR is the linearly interpolated percentile (``np.percentile``'s
+        default method) and CVaR the mean of returns at or below it. Both come
+        from a single ``np.partition``, skipping percentile's dispatch overhead.
+        """
+        n = returns.size
+        if n == 0:
+            return float("nan"), float("nan")
+        pos = (1 - confidence) * (n - 1)
+        k = int(pos)
+        if k + 1 >= n:
+            part = np.partition(returns, k)
+            var = part[k]
+        else:
+            part = np.partition(returns, (k, k + 1))
+            lo, hi = part[k], part[k + 1]
+            var = lo + (hi - lo) * (pos - k)
+            if hi <= var:  # ties at the cut-off reach past the k-th slot
+                return float(var), float(returns[returns <= var].mean())
+        cvar = part[:k + 1].mean()
+        return float(var), float(cvar)
 
     @staticmethod
-    def _value_at_risk(returns: pd.Series, confidence: float = 0.95) -> float:
-        return round(float(np.percentile(returns, (1 - confidence) * 100)), 4)
+    def _moments(returns: np.ndarray) -> tuple[float, float | None, float | None]:
+        """Sample std, skewness and excess kurtosis from one set of central moments.
+
+        The std matches ``ndarray.std(ddof=1)``. Skewness and kurtosis use the
+        same bias-corrected estimators as pandas' ``Series.skew`` and
+        ``Series.kurtosis``, and are None for 10 or fewer returns.
+        """
+        n = returns.size
+        if n < 2:
+            return float("nan"), None, None
+        d = returns - returns.mean()
+        d2 = d * d
+        m2 = d2.sum()
+        std = float(np.sqrt(m2 / (n - 1)))
+        if n <= 10:
+            return std, None, None
+        if m2 < 1e-14:
+            return std, 0.0, 0.0
+        m3 = (d2 * d).sum()
+        m4 = (d2 * d2).sum()
+        skew = n * (n - 1) ** 0.5 / (n - 2) * (m3 / m2 ** 1.5)
+        kurt = (n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2)
+                - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+        return std, float(skew), float(kurt)
 
     @staticmethod
-    def _conditional_var(returns: pd.Series, confidence: float = 0.95) -> float:
-        var = np.percentile(returns, (1 - confidence) * 100)
-        return round(float(returns[returns <= var].mean()), 4)
+    def _gaussian_var_cvar(returns: np.ndarray, confidence: float = 0.95) -> tuple[float, float]:
+        """Closed-form VaR and CVaR assuming normally distributed returns.
+
+        Reported next to the historical estimates; a large gap between the
+        two flags fat tails that the Gaussian model understates.
+        """
+        alpha = 1 - confidence
+        mu, sigma = float(returns.mean()), float(returns.std(ddof=1))
+        z = _STD_NORMAL.inv_cdf(alpha)
+        var = mu + z * sigma
+        cvar = mu - sigma * _STD_NORMAL.pdf(z) / alpha
+        return var, cvar
 
 
 # ------------------------------------------------------------------
@@ -322,7 +493,6 @@ def compute_risk_score(result: dict) -> tuple[float, dict]:
     # 5. Liquidity (15%) — log-linear interpolation on dollar volume
     #    Eliminates 30-point cliffs at tier boundaries.
     #    Anchors: $100K (log10=5) → 5, $100M (log10=8) → 100
-    import math
     liq = result.get("liquidity", {})
     dollar_vol = liq.get("avg_dollar_volume_20d", 0)
     if dollar_vol <= 0:
@@ -6,18 +6,15 @@ conviction meta-score that measures agreement across dimensions.
 Weights are loaded from configs/settings.yaml (single source of truth).
 """
 
+import copy
 import hashlib
-import numpy as np
-
-from src.analysis.technical import TechnicalAnalyzer
-from src.analysis.fundamental import FundamentalAnalyzer
-from src.analysis.valuation import ValuationAnalyzer, _mos_to_score
-from src.analysis.sentiment import SentimentAnalyzer
-from src.analysis.risk import RiskAnalyzer, compute_risk_score
-from src.analysis.international import InternationalAnalyzer
-from src.analysis.portfolio_risk import PortfolioRiskAnalyzer
-from src.analysis.moat import MoatAnalyzer
-from src.data_sources.market_data import MarketDataClient
+import math
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from src.utils.logger import setup_logger
 
 logger = setup_logger("scoring")
@@ -54,17 +51,157 @@ def _load_weights_from_settings() -> dict[str, float]:
     }
 
 
+def _clamp_score(x: float) -> float:
+    """Clamp ``x`` to the 0-100 score range."""
+    return 0 if x < 0 else 100 if x > 100 else x
+
+
+def _avg_premium(comparison: dict) -> float | None:
+    """Mean ``premium_pct`` across peer-multiple comparisons, or None if none are set."""
+    total = 0.0
+    n = 0
+    for v in comparison.values():
+        p = v.get("premium_pct")
+        if p is not None:
+            total += p
+            n += 1
+    return total / n if n else None
+
+
 # Minimum weight coverage required to issue a recommendation.
 # Below this threshold the system outputs "INSUFFICIENT DATA".
 MIN_WEIGHT_COVERAGE = 0.50
 
+# Tier tables: a value below breaks[i] falls in tier i, anything at or
+# above the last break in the final tier.
+_RECOMMENDATION_BREAKS = (30, 45, 60, 75)
+_RECOMMENDATIONS = ("STRONG SELL", "SELL", "HOLD", "BUY", "STRONG BUY")
+_CONVICTION_BREAKS = (45, 70)
+_CONVICTION_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+# Technical signal -> bullishness (BUY 1, neutral 0.5, SELL 0). Signals not
+# listed carry no direction and are left out of the technical score.
+_SIGNAL_VALUES = {
+    "BUY": 1.0,
+    "HOLD": 0.5,
+    "NORMAL": 0.5,
+    "ELEVATED": 0.5,
+    "HIGH VOLUME": 0.5,
+    "LOW VOLUME": 0.5,
+    "SELL": 0.0,
+}
+# Signal confidence -> weight; anything other than HIGH/MEDIUM weighs 0.5.
+_CONFIDENCE_WEIGHTS = {"HIGH": 1.5, "MEDIUM": 1.0}
+
+# Engines whose scores are backtest-validated (price-based, point-in-time).
+_BACKTEST_VALIDATED = frozenset({"technical", "risk"})
+
+# Cap on the total points cross-dimensional confirmations can add.
+_MAX_TOTAL_BOOST = 15.0
+
+# Threads in each scorer's engine pool. One score() submits ten calls;
+# score_many() overlaps several tickers up to this bound.
+_MAX_WORKERS = 32
+
+# In-process LRU cache of finished scores:
+# (ticker, model version, composite valuation on?) -> (monotonic time, result).
+# Repeat scoring of a ticker within the TTL (dashboard refresh, portfolio
+# loops) skips every engine call; scorers configured differently never
+# share entries. Bounded so screening a whole universe can't grow it forever.
+_ScoreKey = tuple[str, str, bool]
+_score_cache: OrderedDict[_ScoreKey, tuple[float, dict]] = OrderedDict()
+_score_lock = threading.Lock()
+_SCORE_TTL = 900  # 15 minutes
+_SCORE_CACHE_MAXSIZE = 256
+
+
+def recommendation_for(composite: float) -> str:
+    """Map a 0-100 composite score to its recommendation label."""
+    return _RECOMMENDATIONS[bisect_right(_RECOMMENDATION_BREAKS, composite)]
+
+
+def _get_cached_score(key: _ScoreKey, now: float) -> dict | None:
+    """Return a copy of the cached score for ``key`` if still fresh."""
+    with _score_lock:
+        entry = _score_cache.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] >= _SCORE_TTL:
+            del _score_cache[key]
+            return None
+        _score_cache.move_to_end(key)
+    logger.debug("Score cache hit for %s", key[0])
+    return copy.deepcopy(entry[1])
+
+
+def _store_score(key: _ScoreKey, now: float, result: dict) -> dict:
+    """Cache ``result`` (unless data was insufficient) and return a copy.
+
+    Expired entries are purged on insert, then the least recently used ones
+    are evicted down to ``_SCORE_CACHE_MAXSIZE``.
+    """
+    if result["recommendation"] != "INSUFFICIENT DATA":  # let the next call retry
+        with _score_lock:
+            for k in [k for k, (t, _) in _score_cache.items() if now - t >= _SCORE_TTL]:
+                del _score_cache[k]
+            _score_cache[key] = (now, result)
+            _score_cache.move_to_end(key)
+            while len(_score_cache) > _SCORE_CACHE_MAXSIZE:
+                _score_cache.popitem(last=False)
+    return copy.deepcopy(result)
+
+
+def clear_score_cache(ticker: str | None = None):
+    """Clear the score cache (all, or every entry for a specific ticker)."""
+    with _score_lock:
+        if ticker:
+            for key in [k for k in _score_cache if k[0] == ticker]:
+                del _score_cache[key]
+        else:
+            _score_cache.clear()
+
 
 class StockScorer:
     """Generate a composite investment score (0-100) for a stock."""
 
     WEIGHTS = _load_weights_from_settings()
+    # Deterministic model fingerprint from weights and engine list; WEIGHTS
+    # is fixed at class creation, so hash it once. MD5 is kept so existing
+    # version strings stay comparable; it is not used for security.
+    _MODEL_VERSION = "v1-" + hashlib.md5(
+        str(sorted(WEIGHTS.items())).encode(), usedforsecurity=False
+    ).hexdigest()[:8]
+
+    # Run the multi-method composite fair value alongside the FCF DCF. Set
+    # False for a faster mode that only falls back to the composite when
+    # the DCF produced no margin of safety.
+    USE_COMPOSITE_VALUATION = True
+
+    # Fundamental sub-score weights: (FundamentalAnalyzer result key, weight).
+    # Piotroski uses the result's dynamic max_score (only evaluable tests).
+    _FUND_CORE_SUBSCORES = (("health", 0.25), ("growth", 0.20), ("valuation", 0.15))
+    _FUND_CORE_WEIGHT = 0.60
+    _FUND_OPTIONAL_SUBSCORES = (
+        ("roic", 0.15),
+        ("piotroski", 0.10),
+        ("earnings_quality", 0.08),
+        ("capital_allocation", 0.07),
+    )
 
     def __init__(self):
+        # Engines are imported here, not at module level, so importing this
+        # module (e.g. for WEIGHTS) doesn't load yfinance or the analyzer
+        # modules and their dependencies.
+        from src.analysis.technical import TechnicalAnalyzer
+        from src.analysis.fundamental import FundamentalAnalyzer
+        from src.analysis.valuation import ValuationAnalyzer
+        from src.analysis.sentiment import SentimentAnalyzer
+        from src.analysis.risk import RiskAnalyzer
+        from src.analysis.international import InternationalAnalyzer
+        from src.analysis.portfolio_risk import PortfolioRiskAnalyzer
+        from src.analysis.moat import MoatAnalyzer
+        from src.data_sources.market_data import MarketDataClient
+
         self.market = MarketDataClient()
         self.tech = TechnicalAnalyzer()
         self.fund = FundamentalAnalyzer()
@@ -74,60 +211,121 @@ class StockScorer:
         self.intl = InternationalAnalyzer()
         self.port_risk = PortfolioRiskAnalyzer()
         self.moat = MoatAnalyzer()
+        # Shared by every score()/score_many() call; threads start on demand.
+        self._pool = ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="scorer")
+
+    def close(self) -> None:
+        """Shut down the engine thread pool, waiting for in-flight calls."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def score(self, ticker: str) -> dict:
-        """Compute composite score for a stock."""
+        """Compute composite score for a stock.
+
+        Results are cached per ticker and scorer configuration for
+        ``_SCORE_TTL`` seconds (at most ``_SCORE_CACHE_MAXSIZE`` entries,
+        emptied by :func:`clear_score_cache`); callers get a deep copy so
+        mutating the returned dict never touches the cache.
+        """
+        now = time.monotonic()
+        key = self._score_key(ticker)
+        cached = _get_cached_score(key, now)
+        if cached is not None:
+            return cached
+
+        # .result() re-raises any engine exception inside the matching
+        # try block of _assemble_score.
+        futures = self._submit_engines(ticker)
+        return _store_score(key, now, self._assemble_score(ticker, futures))
+
+    def score_many(self, tickers: list[str]) -> list[dict]:
+        """Score several stocks, overlapping their engine calls on the pool.
+
+        Returns results in input order. Cached tickers are answered without
+        touching the pool; the rest overlap both across and within tickers.
+        """
+        now = time.monotonic()
+        results: dict[str, dict] = {}
+        pending = []
+        for t in dict.fromkeys(tickers):
+            cached = _get_cached_score(self._score_key(t), now)
+            if cached is not None:
+                results[t] = cached
+            else:
+                pending.append(t)
+
+        futures = {t: self._submit_engines(t) for t in pending}
+        for t in pending:
+            results[t] = _store_score(self._score_key(t), now,
+                                      self._assemble_score(t, futures[t]))
+
+        # Repeated tickers get their own copy so callers can mutate freely.
+        out = []
+        seen = set()
+        for t in tickers:
+            out.append(copy.deepcopy(results[t]) if t in seen else results[t])
+            seen.add(t)
+        return out
+
+    def _score_key(self, ticker: str) -> _ScoreKey:
+        """Score cache key: results depend on the weights and valuation mode."""
+        return (ticker, self._MODEL_VERSION, self.USE_COMPOSITE_VALUATION)
+
+    def _submit_engines(self, ticker: str) -> dict[str, Future]:
+        """Submit every engine call for ``ticker``; they are all independent."""
         logger.info("Scoring %s", ticker)
+        pool = self._pool
+        futures = {
+            "fundamental": pool.submit(self.fund.analyze, ticker),
+            "dcf": pool.submit(self.val.dcf_valuation, ticker),
+            "comparables": pool.submit(self.val.comparable_valuation, ticker),
+            "prices": pool.submit(self.market.get_price_history, ticker),
+            "sentiment": pool.submit(self.sent.analyze, ticker),
+            "risk": pool.submit(self.risk.analyze, ticker),
+            "international": pool.submit(self.intl.analyze, ticker),
+            "portfolio_risk": pool.submit(self.port_risk.analyze, [{"ticker": ticker, "weight": 1.0}]),
+            "moat": pool.submit(self.moat.score_moat, ticker),
+        }
+        if self.USE_COMPOSITE_VALUATION:
+            futures["composite"] = pool.submit(self.val.composite_fair_value, ticker)
+        return futures
+
+    def _assemble_score(self, ticker: str, futures: dict[str, Future]) -> dict:
+        """Combine the engine results for ``ticker`` into the composite score."""
+        from src.analysis.risk import compute_risk_score
+        from src.analysis.valuation import _mos_to_score
+
         scores: dict[str, float | None] = {}
         details = {}
         data_quality: dict[str, dict] = {}
 
         # Fundamental score (0-100)
         try:
-            fund_result = self.fund.analyze(ticker)
-            health = fund_result["health"]["score"] / max(fund_result["health"]["max_score"], 1)
-            growth = fund_result["growth"]["score"] / max(fund_result["growth"]["max_score"], 1)
-            val_score = fund_result["valuation"]["score"] / max(fund_result["valuation"]["max_score"], 1)
-
-            # Incorporate new metrics if available
-            sub_scores = [health * 0.25, growth * 0.20, val_score * 0.15]
-            sub_total_weight = 0.60
-
-            # ROIC — skip if score is None (data unavailable)
-            roic = fund_result.get("roic", {})
-            roic_score = roic.get("score")
-            if roic_score is not None and roic.get("max_score"):
-                roic_pct = roic_score / roic["max_score"]
-                sub_scores.append(roic_pct * 0.15)
-                sub_total_weight += 0.15
-
-            # Piotroski F-Score — use dynamic max_score, skip if None
-            piotroski = fund_result.get("piotroski", {})
-            pio_score = piotroski.get("score")
-            pio_max = piotroski.get("max_score", 0)
-            if pio_score is not None and pio_max > 0:
-                pio_pct = pio_score / pio_max
-                sub_scores.append(pio_pct * 0.10)
-                sub_total_weight += 0.10
-
-            # Earnings quality — skip if score is None (data unavailable)
-            eq = fund_result.get("earnings_quality", {})
-            eq_score = eq.get("score")
-            if eq_score is not None and eq.get("max_score"):
-                eq_pct = eq_score / eq["max_score"]
-                sub_scores.append(eq_pct * 0.08)
-                sub_total_weight += 0.08
-
-            # Capital allocation — skip if score is None (data unavailable)
-            ca = fund_result.get("capital_allocation", {})
-            ca_score = ca.get("score")
-            if ca_score is not None and ca.get("max_score"):
-                ca_pct = ca_score / ca["max_score"]
-                sub_scores.append(ca_pct * 0.07)
-                sub_total_weight += 0.07
+            fund_result = futures["fundamental"].result()
+            # Core sub-scores are always present; max_score floors at 1.
+            sub_total = 0.0
+            for key, weight in self._FUND_CORE_SUBSCORES:
+                sub = fund_result[key]
+                sub_total += sub["score"] / max(sub["max_score"], 1) * weight
+            sub_total_weight = self._FUND_CORE_WEIGHT
+
+            # Optional sub-scores — skip when the score is None (data
+            # unavailable) or there is no max_score to normalize against.
+            for key, weight in self._FUND_OPTIONAL_SUBSCORES:
+                sub = fund_result.get(key, {})
+                sub_score = sub.get("score")
+                sub_max = sub.get("max_score")
+                if sub_score is not None and sub_max:
+                    sub_total += sub_score / sub_max * weight
+                    sub_total_weight += weight
 
             # Normalize to 100
-            scores["fundamental"] = (sum(sub_scores) / sub_total_weight) * 100 if sub_total_weight > 0 else None
+            scores["fundamental"] = (sub_total / sub_total_weight) * 100 if sub_total_weight > 0 else None
             details["fundamental"] = fund_result
             data_quality["fundamental"] = {"status": "ok", "error": None}
         except Exception as e:
@@ -137,14 +335,19 @@ class StockScorer:
 
         # Valuation score (0-100): Composite DCF 60% + Comps 25% + Quality 15%
         try:
-            dcf = self.val.dcf_valuation(ticker)
-            comps = self.val.comparable_valuation(ticker)
+            dcf = futures["dcf"].result()
+            comps = futures["comparables"].result()
 
-            # Multi-method composite fair value
+            # Multi-method composite fair value. With the composite disabled
+            # it is still computed when the DCF has no usable MOS of its own.
             composite_val = {}
             try:
-                composite_val = self.val.composite_fair_value(ticker)
-                dcf["composite"] = composite_val
+                if "composite" in futures:
+                    composite_val = futures["composite"].result()
+                    dcf["composite"] = composite_val
+                elif dcf.get("margin_of_safety_pct") is None or "error" in dcf:
+                    composite_val = self.val.composite_fair_value(ticker)
+                    dcf["composite"] = composite_val
             except Exception as e:
                 logger.warning("Composite valuation failed for %s: %s", ticker, e)
 
@@ -160,12 +363,9 @@ class StockScorer:
 
             # Comps score (25% weight)
             comps_score = 50
-            if comps.get("comparison"):
-                premiums = [v["premium_pct"] for v in comps["comparison"].values()
-                            if v.get("premium_pct") is not None]
-                if premiums:
-                    avg_premium = sum(premiums) / len(premiums)
-                    comps_score = max(0, min(100, 50 - avg_premium))
+            avg_premium = _avg_premium(comps.get("comparison") or {})
+            if avg_premium is not None:
+                comps_score = _clamp_score(50 - avg_premium)
 
             # Quality score (15% weight) — reuse fundamental health
             quality_score = scores.get("fundamental") or 50
@@ -177,6 +377,7 @@ class StockScorer:
                 "dcf_score": round(dcf_score, 1),
                 "comps_score": round(comps_score, 1),
                 "quality_score": round(quality_score, 1),
+                "avg_premium": avg_premium,
             }
             data_quality["valuation"] = {"status": "ok", "error": None}
         except Exception as e:
@@ -186,31 +387,17 @@ class StockScorer:
 
         # Technical score (0-100) — confidence-weighted, excludes non-directional signals
         try:
-            df = self.market.get_price_history(ticker)
+            df = futures["prices"].result()
             signals = self.tech.get_signals(df)
 
-            BUY_SIGNALS = {"BUY"}
-            NEUTRAL_SIGNALS = {"HOLD", "NORMAL", "ELEVATED", "HIGH VOLUME", "LOW VOLUME"}
-            SELL_SIGNALS = {"SELL"}
-
             weighted_sum = 0.0
             total_weight = 0.0
             for s in signals.values():
-                sig = s.get("signal")
-                if sig is None:
-                    continue
-                conf = s.get("confidence", "MEDIUM")
-                w = 1.5 if conf == "HIGH" else 1.0 if conf == "MEDIUM" else 0.5
-
-                if sig in BUY_SIGNALS:
-                    weighted_sum += 1.0 * w
-                elif sig in NEUTRAL_SIGNALS:
-                    weighted_sum += 0.5 * w
-                elif sig in SELL_SIGNALS:
-                    weighted_sum += 0.0 * w
-                else:
+                value = _SIGNAL_VALUES.get(s.get("signal"))
+                if value is None:  # missing or non-directional signal
                     continue
-
+                w = _CONFIDENCE_WEIGHTS.get(s.get("confidence", "MEDIUM"), 0.5)
+                weighted_sum += value * w
                 total_weight += w
 
             scores["technical"] = (weighted_sum / total_weight) * 100 if total_weight > 0 else None
@@ -223,8 +410,8 @@ class StockScorer:
 
         # Sentiment score (0-100)
         try:
-            sent = self.sent.analyze(ticker)
-            scores["sentiment"] = max(0, min(100, 50 + sent["overall_score"] * 50))
+            sent = futures["sentiment"].result()
+            scores["sentiment"] = _clamp_score(50 + sent["overall_score"] * 50)
             details["sentiment"] = sent
             data_quality["sentiment"] = {"status": "ok", "error": None}
         except Exception as e:
@@ -234,7 +421,7 @@ class StockScorer:
 
         # Risk score (0-100, higher = less risky = better)
         try:
-            risk = self.risk.analyze(ticker)
+            risk = futures["risk"].result()
             if "error" in risk:
                 logger.warning("Risk analysis returned error for %s: %s", ticker, risk["error"])
                 scores["risk"] = None
@@ -252,7 +439,7 @@ class StockScorer:
 
         # International score (0-100)
         try:
-            intl_result = self.intl.analyze(ticker)
+            intl_result = futures["international"].result()
             # Scoring logic mirrors InternationalAnalyzerPlugin
             intl_score = 70.0
             adr = intl_result.get("adr_analysis", {})
@@ -270,7 +457,7 @@ class StockScorer:
             country = intl_result.get("country", "United States")
             if country == "United States":
                 intl_score = 80.0
-            scores["international"] = round(max(0, min(100, intl_score)), 1)
+            scores["international"] = round(_clamp_score(intl_score), 1)
             details["international"] = intl_result
             data_quality["international"] = {"status": "ok", "error": None}
         except Exception as e:
@@ -282,7 +469,7 @@ class StockScorer:
         # In single-stock mode, set to None so weight redistributes to
         # engines that actually provide signal for this ticker.
         try:
-            port_result = self.port_risk.analyze([{"ticker": ticker, "weight": 1.0}])
+            port_result = futures["portfolio_risk"].result()
             scores["portfolio_risk"] = None  # No signal in single-stock mode
             details["portfolio_risk"] = port_result
             data_quality["portfolio_risk"] = {
@@ -296,7 +483,7 @@ class StockScorer:
 
         # Moat score (0-100, from competitive moat analysis)
         try:
-            moat_result = self.moat.score_moat(ticker)
+            moat_result = futures["moat"].result()
             scores["moat"] = moat_result.get("composite_moat_score")
             details["moat"] = moat_result
             data_quality["moat"] = {"status": "ok", "error": None}
@@ -306,36 +493,39 @@ class StockScorer:
             data_quality["moat"] = {"status": "failed", "error": str(e)}
 
         # Composite — skip None scores, redistribute weights
-        available = {k: v for k, v in scores.items() if v is not None and k in self.WEIGHTS}
-        available_weight = sum(self.WEIGHTS[k] for k in available)
+        # One pass pairs each score with its weight so neither the weight
+        # total nor the weighted sum goes back to the WEIGHTS dict.
+        weights = self.WEIGHTS
+        available = {}
+        weighted: list[tuple[float, float]] = []
+        for k, v in scores.items():
+            if v is not None and k in weights:
+                available[k] = v
+                weighted.append((v, weights[k]))
+        available_weight = sum(w for _, w in weighted)
         if available_weight > 0:
-            composite = sum(available[k] * self.WEIGHTS[k] / available_weight for k in available)
+            composite = sum(v * w / available_weight for v, w in weighted)
         else:
             composite = 50.0  # Total failure fallback
 
         # Minimum coverage threshold — refuse recommendation if too few engines succeeded
         insufficient_data = available_weight < MIN_WEIGHT_COVERAGE
 
-        # Recommendation
         if insufficient_data:
+            # Nothing to weigh agreement or conflicts against without a
+            # recommendation; skip both.
             recommendation = "INSUFFICIENT DATA"
-        elif composite >= 75:
-            recommendation = "STRONG BUY"
-        elif composite >= 60:
-            recommendation = "BUY"
-        elif composite >= 45:
-            recommendation = "HOLD"
-        elif composite >= 30:
-            recommendation = "SELL"
+            conviction = {"level": "LOW", "score": 0, "detail": "Insufficient data"}
+            conflicts = {"conflicts": [], "count": 0, "has_high_severity": False}
         else:
-            recommendation = "STRONG SELL"
+            recommendation = recommendation_for(composite)
 
-        # Conviction meta-score (use available scores only)
-        scores_for_conviction = {k: v for k, v in scores.items() if v is not None}
-        conviction = self._compute_conviction(scores_for_conviction, details)
+            # Conviction meta-score (use available scores only)
+            scores_for_conviction = {k: v for k, v in scores.items() if v is not None}
+            conviction = self._compute_conviction(scores_for_conviction, details)
 
-        # Cross-analyzer conflict detection
-        conflicts = self._detect_conflicts(scores_for_conviction, details)
+            # Cross-analyzer conflict detection
+            conflicts = self._detect_conflicts(scores_for_conviction, details)
 
         # Red flags from fundamentals
         fund_detail = details.get("fundamental", {})
@@ -343,8 +533,14 @@ class StockScorer:
 
         # Data quality summary
         total_engines = len(data_quality)
-        ok_engines = [k for k, v in data_quality.items() if v["status"] == "ok"]
-        failed_engines = [k for k, v in data_quality.items() if v["status"] == "failed"]
+        ok_engines = []
+        failed_engines = []
+        for k, v in data_quality.items():
+            status = v["status"]
+            if status == "ok":
+                ok_engines.append(k)
+            elif status == "failed":
+                failed_engines.append(k)
         quality_summary = {
             "engines_succeeded": ok_engines,
             "engines_failed": failed_engines,
@@ -357,15 +553,13 @@ class StockScorer:
         model_version = self._model_version()
 
         # Backtest validation status per engine
+        validated = []
+        unvalidated = []
+        for k in available:
+            (validated if k in _BACKTEST_VALIDATED else unvalidated).append(k)
         validation_status = {
-            "backtest_validated": [
-                k for k in available
-                if k in ("technical", "risk")
-            ],
-            "backtest_unvalidated": [
-                k for k in available
-                if k not in ("technical", "risk")
-            ],
+            "backtest_validated": validated,
+            "backtest_unvalidated": unvalidated,
             "note": (
                 "Only price-based engines (technical, risk) are backtest-validated "
                 "via walk-forward point-in-time scoring. Fundamental, valuation, "
@@ -392,8 +586,7 @@ class StockScorer:
     @classmethod
     def _model_version(cls) -> str:
         """Deterministic model fingerprint from weights and engine list."""
-        sig = str(sorted(cls.WEIGHTS.items()))
-        return "v1-" + hashlib.md5(sig.encode()).hexdigest()[:8]
+        return cls._MODEL_VERSION
 
     @staticmethod
     def _detect_conflicts(scores: dict, details: dict) -> dict:
@@ -404,14 +597,16 @@ class StockScorer:
         """
         conflicts: list[dict] = []
 
-        fund_score = scores.get("fundamental", 50)
-        val_score = scores.get("valuation", 50)
-        tech_score = scores.get("technical", 50)
-        sent_score = scores.get("sentiment", 50)
-        risk_score = scores.get("risk", 50)
+        # Missing engines are left as None and any rule that needs them is
+        # skipped, rather than compared against an imputed neutral 50.
+        fund_score = scores.get("fundamental")
+        val_score = scores.get("valuation")
+        tech_score = scores.get("technical")
+        sent_score = scores.get("sentiment")
+        risk_score = scores.get("risk")
 
         # 1. Technical BUY but DCF says overvalued
-        if tech_score > 65 and val_score < 35:
+        if tech_score is not None and val_score is not None and tech_score > 65 and val_score < 35:
             conflicts.append({
                 "type": "technical_vs_valuation",
                 "severity": "HIGH",
@@ -419,7 +614,7 @@ class StockScorer:
             })
 
         # 2. DCF undervalued but technical SELL (falling knife)
-        if val_score > 65 and tech_score < 35:
+        if val_score is not None and tech_score is not None and val_score > 65 and tech_score < 35:
             conflicts.append({
                 "type": "valuation_vs_technical",
                 "severity": "HIGH",
@@ -427,21 +622,24 @@ class StockScorer:
             })
 
         # 3. Strong fundamentals but bearish sentiment
-        if fund_score > 65 and sent_score < 35:
+        if fund_score is not None and sent_score is not None and fund_score > 65 and sent_score < 35:
             conflicts.append({
                 "type": "fundamental_vs_sentiment",
                 "severity": "MEDIUM",
                 "detail": f"Fundamentals strong ({fund_score:.0f}) but sentiment bearish ({sent_score:.0f}) — contrarian opportunity or market knows something",
             })
 
-        # 4. High risk but bullish everything else
-        avg_other = (fund_score + val_score + tech_score) / 3
-        if risk_score < 30 and avg_other > 60:
-            conflicts.append({
-                "type": "risk_vs_opportunity",
-                "severity": "MEDIUM",
-                "detail": f"Bullish signals (avg {avg_other:.0f}) but high risk ({risk_score:.0f}) — size positions accordingly",
-            })
+        # 4. High risk but bullish everything else — averaged over whichever
+        # of fundamental/valuation/technical are present (at least two)
+        others = [v for v in (fund_score, val_score, tech_score) if v is not None]
+        if risk_score is not None and risk_score < 30 and len(others) >= 2:
+            avg_other = sum(others) / len(others)
+            if avg_other > 60:
+                conflicts.append({
+                    "type": "risk_vs_opportunity",
+                    "severity": "MEDIUM",
+                    "detail": f"Bullish signals (avg {avg_other:.0f}) but high risk ({risk_score:.0f}) — size positions accordingly",
+                })
 
         # 5. Insider selling while analyst targets high
         sent_detail = details.get("sentiment", {})
@@ -471,86 +669,90 @@ class StockScorer:
         Low conviction = mixed signals across dimensions.
         """
         # Normalize all scores to -1 (bearish) to +1 (bullish)
-        normalized = {}
-        for k, v in scores.items():
-            normalized[k] = (v - 50) / 50  # maps 0-100 → -1 to +1
-
-        vals = list(normalized.values())
+        vals = [(v - 50) / 50 for v in scores.values()]  # maps 0-100 → -1 to +1
         if len(vals) < 2:
             return {"level": "LOW", "score": 0, "detail": "Insufficient data"}
 
-        std = float(np.std(vals))
-        mean = float(np.mean(vals))
+        # Plain Python on a handful of floats: NumPy's array setup costs more
+        # than the arithmetic here. Population std (ddof=0), as np.std.
+        # The deviation pass also counts directional signals. Variance stays
+        # two-pass: E[x^2] - mean^2 cancels badly when engines agree.
+        n = len(vals)
+        mean = sum(vals) / n
+        sq_dev = 0.0
+        bullish_count = 0
+        bearish_count = 0
+        for v in vals:
+            d = v - mean
+            sq_dev += d * d
+            if v > 0.1:
+                bullish_count += 1
+            elif v < -0.1:
+                bearish_count += 1
+        std = math.sqrt(sq_dev / n)
         # Low std = high agreement = high conviction
         agreement = max(0, 1 - std * 2)  # 0-1 scale
         extremity = abs(mean)  # 0-1 scale
 
         conviction_score = round((agreement * 0.6 + extremity * 0.4) * 100, 1)
 
-        # Directional signals
-        bullish_count = sum(1 for v in vals if v > 0.1)
-        bearish_count = sum(1 for v in vals if v < -0.1)
-
         # Cross-dimensional confirmations.
         # Each confirmation is scaled by the agreement score so that
         # boosters amplify conviction only when engines already agree.
-        # Max total boost capped at 15 points.
-        boosters = []
-        _MAX_TOTAL_BOOST = 15.0
-        _total_boost = 0.0
-
-        def _apply_boost(base_pts: float, label: str) -> None:
-            nonlocal conviction_score, _total_boost
-            if _total_boost >= _MAX_TOTAL_BOOST:
-                return
-            scaled = base_pts * agreement  # scale by inter-engine agreement
-            scaled = min(scaled, _MAX_TOTAL_BOOST - _total_boost)
-            if scaled > 0.5:  # Don't bother with negligible boosts
-                conviction_score = min(100, conviction_score + scaled)
-                _total_boost += scaled
-                boosters.append(f"{label} (+{scaled:.1f})")
+        # Max total boost capped at 15 points. The checks below only collect
+        # (base points, label) pairs; the boosts are applied in order after.
+        confirmations: list[tuple[float, str]] = []
+        fund_details = details.get("fundamental", {})
 
         # Piotroski confirmation — only boost if enough tests were evaluable
-        piotroski = details.get("fundamental", {}).get("piotroski", {})
+        piotroski = fund_details.get("piotroski", {})
         pio_score = piotroski.get("score")
         pio_max = piotroski.get("max_score", 0)
         if pio_score is not None and pio_max >= 5:
             if pio_score >= 7:
-                _apply_boost(6.0, "Piotroski F-Score confirms strength")
+                confirmations.append((6.0, "Piotroski F-Score confirms strength"))
             elif pio_score <= 2 and pio_max >= 7:
-                _apply_boost(6.0, "Piotroski F-Score confirms weakness")
+                confirmations.append((6.0, "Piotroski F-Score confirms weakness"))
 
         # Insider + analyst alignment
         sent = details.get("sentiment", {})
         insider_pct = sent.get("ownership", {}).get("insider_pct")
         analyst_targets = sent.get("analyst_targets", {})
         if insider_pct and insider_pct > 0.05 and analyst_targets.get("upside_pct", 0) > 15:
-            _apply_boost(5.0, "Insiders hold significant stake + analysts see upside")
+            confirmations.append((5.0, "Insiders hold significant stake + analysts see upside"))
 
         # DCF + comps alignment
         val_details = details.get("valuation", {})
         dcf_mos = val_details.get("dcf", {}).get("margin_of_safety_pct", 0)
-        comps_premium = 0
-        comps_data = val_details.get("comparables", {}).get("comparison", {})
-        if comps_data:
-            premiums = [v.get("premium_pct", 0) for v in comps_data.values() if v.get("premium_pct") is not None]
-            comps_premium = sum(premiums) / len(premiums) if premiums else 0
+        if "avg_premium" in val_details:
+            comps_premium = val_details["avg_premium"]
+        else:
+            comps_premium = _avg_premium(val_details.get("comparables", {}).get("comparison") or {})
+        if comps_premium is None:
+            comps_premium = 0
         if dcf_mos > 15 and comps_premium < -10:
-            _apply_boost(6.0, "DCF and comps both signal undervaluation")
+            confirmations.append((6.0, "DCF and comps both signal undervaluation"))
         elif dcf_mos < -15 and comps_premium > 10:
-            _apply_boost(6.0, "DCF and comps both signal overvaluation")
+            confirmations.append((6.0, "DCF and comps both signal overvaluation"))
 
         # Earnings quality confirmation
-        eq = details.get("fundamental", {}).get("earnings_quality", {})
+        eq = fund_details.get("earnings_quality", {})
         if eq.get("fcf_ni_ratio") is not None and eq["fcf_ni_ratio"] > 1.2:
-            _apply_boost(4.0, "High earnings quality (FCF > Net Income)")
+            confirmations.append((4.0, "High earnings quality (FCF > Net Income)"))
 
-        if conviction_score >= 70:
-            level = "HIGH"
-        elif conviction_score >= 45:
-            level = "MEDIUM"
-        else:
-            level = "LOW"
+        boosters = []
+        total_boost = 0.0
+        for base_pts, label in confirmations:
+            if total_boost >= _MAX_TOTAL_BOOST:
+                break
+            scaled = base_pts * agreement  # scale by inter-engine agreement
+            scaled = min(scaled, _MAX_TOTAL_BOOST - total_boost)
+            if scaled > 0.5:  # Don't bother with negligible boosts
+                conviction_score = min(100, conviction_score + scaled)
+                total_boost += scaled
+                boosters.append(f"{label} (+{scaled:.1f})")
+
+        level = _CONVICTION_LEVELS[bisect_right(_CONVICTION_BREAKS, conviction_score)]
 
         return {
             "level": level,
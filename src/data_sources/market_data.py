@@ -3,6 +3,8 @@
 Primary: yfinance | Fallback: TwelveData REST API
 """
 
+import threading
+
 import pandas as pd
 import requests as req_lib
 import yfinance as yf
@@ -14,6 +16,16 @@ from src.utils.logger import setup_logger
 logger = setup_logger("market_data")
 cache = DataCache("price_historical")
 
+# Per cache-key fetch locks: concurrent requests for the same history (e.g.
+# several scoring engines running in parallel) wait for one download.
+_fetch_locks: dict[str, threading.Lock] = {}
+_fetch_locks_guard = threading.Lock()
+
+
+def _fetch_lock(cache_key: str) -> threading.Lock:
+    with _fetch_locks_guard:
+        return _fetch_locks.setdefault(cache_key, threading.Lock())
+
 # TwelveData period → approximate calendar days for outputsize
 _PERIOD_TO_DAYS = {
     "1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 180,
@@ -85,6 +97,38 @@ def _fetch_twelvedata_history(ticker: str, period: str = "1y", interval: str = "
         return pd.DataFrame()
 
 
+def _exchange_tz(ticker: str) -> str | None:
+    """Exchange timezone yfinance recorded for ``ticker``, if known.
+
+    ``yf.download`` looks up every ticker's timezone before fetching and
+    stores it in yfinance's tz cache, so this is a local lookup.
+    """
+    try:
+        return yf.cache.get_tz_cache().lookup(ticker)
+    except Exception as e:
+        logger.debug("No cached timezone for %s: %s", ticker, e)
+        return None
+
+
+def _unbatch_frame(df: pd.DataFrame, tz: str | None) -> pd.DataFrame | None:
+    """Turn one ticker's slice of a ``yf.download`` result into a ``history()`` frame.
+
+    The batch puts every ticker on one union index converted to the most
+    common timezone, NaN-padding dates a ticker didn't trade (which also
+    upcasts Volume to float). Undo all three so the frame matches what
+    :meth:`MarketDataClient.get_price_history` caches under the same key.
+    Returns None if the exchange timezone is unknown.
+    """
+    if tz is None or df.index.tz is None:
+        return None
+    df = df.dropna(how="all").dropna(subset=["Close"]).copy()
+    df.index = df.index.tz_convert(tz)
+    df.columns.name = None
+    if "Volume" in df.columns and df["Volume"].notna().all():
+        df["Volume"] = df["Volume"].astype("int64")
+    return df
+
+
 class MarketDataClient:
     """Fetch historical and current market data."""
 
@@ -107,23 +151,94 @@ class MarketDataClient:
             logger.info("Cache hit: %s", cache_key)
             return cached
 
-        # Primary: yfinance
-        logger.info("Fetching price history: %s (period=%s)", ticker, period)
-        try:
-            stock = yf.Ticker(ticker)
-            df = stock.history(period=period, interval=interval)
-        except Exception as e:
-            logger.warning("yfinance history failed for %s: %s", ticker, e)
-            df = pd.DataFrame()
-
-        # Fallback: TwelveData (if yfinance returned empty/failed)
-        if df.empty:
-            df = _fetch_twelvedata_history(ticker, period, interval)
-
-        if not df.empty:
-            cache.set_df(cache_key, df)
+        with _fetch_lock(cache_key):
+            # Another thread may have fetched it while we waited
+            cached = cache.get_df(cache_key)
+            if cached is not None:
+                logger.info("Cache hit: %s", cache_key)
+                return cached
+
+            # Primary: yfinance
+            logger.info("Fetching price history: %s (period=%s)", ticker, period)
+            try:
+                stock = yf.Ticker(ticker)
+                df = stock.history(period=period, interval=interval)
+            except Exception as e:
+                logger.warning("yfinance history failed for %s: %s", ticker, e)
+                df = pd.DataFrame()
+
+            # Fallback: TwelveData (if yfinance returned empty/failed)
+            if df.empty:
+                df = _fetch_twelvedata_history(ticker, period, interval)
+
+            if not df.empty:
+                cache.set_df(cache_key, df)
         return df
 
+    def get_price_history_batch(
+        self, tickers: list[str], period: str = "1y", interval: str = "1d"
+    ) -> dict[str, pd.DataFrame]:
+        """Get OHLCV price history for several tickers in one yfinance request.
+
+        Cached tickers are served from the cache and the rest are downloaded
+        together via ``yf.download``. Batch frames are converted back to each
+        ticker's exchange timezone and dtypes before caching. Any ticker the
+        batch request misses (or whose timezone is unknown) goes through
+        :meth:`get_price_history`, so the TwelveData fallback still applies.
+        """
+        results: dict[str, pd.DataFrame] = {}
+        missing: list[str] = []
+        for t in dict.fromkeys(tickers):
+            try:
+                cached = cache.get_df(f"{t}_{period}_{interval}")
+            except Exception as e:
+                logger.warning("Cache read failed for %s: %s", t, e)
+                cached = None
+            if cached is not None:
+                results[t] = cached
+            else:
+                missing.append(t)
+
+        if len(missing) > 1:
+            logger.info("Batch fetching price history: %s (period=%s)", ", ".join(missing), period)
+            try:
+                data = yf.download(
+                    missing, period=period, interval=interval, group_by="ticker",
+                    actions=True, auto_adjust=True, ignore_tz=False,
+                    progress=False, threads=True,
+                )
+            except Exception as e:
+                logger.warning("yfinance batch download failed: %s", e)
+                data = None
+
+            if data is not None and not data.empty:
+                downloaded = set(data.columns.get_level_values(0))
+                for t in missing:
+                    if t not in downloaded:
+                        continue
+                    # One bad symbol must not cost the rest of the batch
+                    try:
+                        df = _unbatch_frame(data[t], _exchange_tz(t))
+                    except Exception as e:
+                        logger.warning("Batch frame for %s unusable: %s", t, e)
+                        continue
+                    if df is None or df.empty:
+                        continue
+                    results[t] = df
+                    try:
+                        cache.set_df(f"{t}_{period}_{interval}", df)
+                    except Exception as e:
+                        logger.warning("Cache write failed for %s: %s", t, e)
+
+        for t in missing:
+            if t not in results:
+                try:
+                    results[t] = self.get_price_history(t, period=period, interval=interval)
+                except Exception as e:
+                    logger.warning("Failed to fetch %s: %s", t, e)
+                    results[t] = pd.DataFrame()
+        return results
+
     def get_current_price(self, ticker: str) -> dict:
         """Get the latest price and basic info."""
         stock = yf.Ticker(ticker)
@@ -137,10 +252,7 @@ class MarketDataClient:
 
     def get_multiple(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:
         """Fetch price history for multiple tickers."""
-        results = {}
-        for t in tickers:
-            results[t] = self.get_price_history(t, period=period)
-        return results
+        return self.get_price_history_batch(tickers, period=period)
 
     def get_quote(self, ticker: str) -> dict:
         """Get real-time quote via finnhub (if key available)."""
@@ -5,6 +5,7 @@ Each step is a function: (PipelineContext) -> None
 
 from __future__ import annotations
 
+from src.analysis.scoring import recommendation_for
 from src.pipeline.context import PipelineContext
 from src.pipeline.registry import get_registry
 from src.data_sources.market_data import MarketDataClient
@@ -119,18 +120,7 @@ def compute_scores(ctx: PipelineContext) -> None:
         # Minimum coverage threshold — refuse recommendation if <50% weight succeeded
         insufficient_data = available_weight < 0.50
 
-        if insufficient_data:
-            rec = "INSUFFICIENT DATA"
-        elif composite >= 75:
-            rec = "STRONG BUY"
-        elif composite >= 60:
-            rec = "BUY"
-        elif composite >= 45:
-            rec = "HOLD"
-        elif composite >= 30:
-            rec = "SELL"
-        else:
-            rec = "STRONG SELL"
+        rec = "INSUFFICIENT DATA" if insufficient_data else recommendation_for(composite)
 
         ctx.scores[ticker] = {
             "composite_score": round(composite, 1),
@@ -2,6 +2,8 @@
 
 import hashlib
 import json
+import os
+import tempfile
 import time
 from pathlib import Path
 
@@ -23,13 +25,28 @@ class DataCache:
         hashed = hashlib.md5(key.encode()).hexdigest()
         return self.cache_dir / f"{hashed}.{ext}"
 
+    def _write_atomic(self, path: Path, write) -> None:
+        """Write via a temp file in the same directory, then rename over ``path``.
+
+        Readers never see a partially written file, even without holding
+        the writer's lock.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
     def get(self, key: str) -> dict | None:
         """Retrieve cached JSON data if not expired."""
         path = self._key_path(key)
         if not path.exists():
             return None
         if time.time() - path.stat().st_mtime > self.ttl_seconds:
-            path.unlink()
+            path.unlink(missing_ok=True)
             return None
         with open(path) as f:
             return json.load(f)
@@ -37,8 +54,12 @@ class DataCache:
     def set(self, key: str, data: dict) -> None:
         """Store JSON data in cache."""
         path = self._key_path(key)
-        with open(path, "w") as f:
-            json.dump(data, f)
+
+        def write(tmp: str) -> None:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+
+        self._write_atomic(path, write)
 
     def get_df(self, key: str) -> pd.DataFrame | None:
         """Retrieve cached DataFrame (parquet)."""
@@ -46,11 +67,11 @@ class DataCache:
         if not path.exists():
             return None
         if time.time() - path.stat().st_mtime > self.ttl_seconds:
-            path.unlink()
+            path.unlink(missing_ok=True)
             return None
         return pd.read_parquet(path)
 
     def set_df(self, key: str, df: pd.DataFrame) -> None:
         """Store DataFrame as parquet."""
         path = self._key_path(key, ext="parquet")
-        df.to_parquet(path)
+        self._write_atomic(path, df.to_parquet)
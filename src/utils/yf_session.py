@@ -53,6 +53,8 @@ _MIN_REQUEST_INTERVAL = 0.5  # 500ms between Yahoo requests (2 req/s)
 _info_cache: dict[str, tuple[float, dict]] = {}
 _info_lock = threading.Lock()
 _INFO_TTL = 300  # 5 minutes
+# Per-ticker fetch locks so concurrent misses share one request
+_info_fetch_locks: dict[str, threading.Lock] = {}
 
 _patched = False
 
@@ -121,12 +123,22 @@ def _get_cached_info(original_fget, self):
             cached_time, cached_data = _info_cache[ticker]
             if now - cached_time < _INFO_TTL:
                 return cached_data
-
-    # Fetch fresh (outside lock to avoid blocking)
-    result = original_fget(self)
-
-    with _info_lock:
-        _info_cache[ticker] = (time.time(), result)
+        fetch_lock = _info_fetch_locks.setdefault(ticker, threading.Lock())
+
+    # Fetch fresh (outside the cache lock to avoid blocking other tickers).
+    # Engines running in parallel often miss on the same ticker at once;
+    # the per-ticker lock makes the later callers wait and reuse the result.
+    with fetch_lock:
+        with _info_lock:
+            if ticker in _info_cache:
+                cached_time, cached_data = _info_cache[ticker]
+                if time.time() - cached_time < _INFO_TTL:
+                    return cached_data
+
+        result = original_fget(self)
+
+        with _info_lock:
+            _info_cache[ticker] = (time.time(), result)
 
     return result
 